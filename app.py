@@ -25,9 +25,9 @@ if 'tasks' not in db.tables:
 
 def get_next_id():
     """Get next available ID."""
-    result = executor.execute('SELECT id FROM tasks ORDER BY id DESC LIMIT 1')
-    if result.rows:
-        return result.rows[0]['id'] + 1
+    max_id = db.get_table('tasks').max_primary_key()
+    if max_id is not None:
+        return max_id + 1
     return 1
 
 @app.route('/')
@@ -45,10 +45,10 @@ def add_task():
         priority = request.form.get('priority', 1)
         
         task_id = get_next_id()
-        sql = f"INSERT INTO tasks (id, title, description, status, priority) VALUES ({task_id}, '{title}', '{description}', 'pending', {priority})"
+        sql = "INSERT INTO tasks (id, title, description, status, priority) VALUES (?, ?, ?, ?, ?)"
         
         try:
-            executor.execute(sql)
+            executor.execute(sql, (task_id, title, description, 'pending', priority))
             flash('Task added successfully!', 'success')
         except Exception as e:
             flash(f'Error: {e}', 'error')
@@ -66,17 +66,17 @@ def edit_task(task_id):
         status = request.form.get('status', 'pending')
         priority = request.form.get('priority', 1)
         
-        sql = f"UPDATE tasks SET title = '{title}', description = '{description}', status = '{status}', priority = {priority} WHERE id = {task_id}"
+        sql = "UPDATE tasks SET title = ?, description = ?, status = ?, priority = ? WHERE id = ?"
         
         try:
-            executor.execute(sql)
+            executor.execute(sql, (title, description, status, priority, task_id))
             flash('Task updated successfully!', 'success')
         except Exception as e:
             flash(f'Error: {e}', 'error')
         
         return redirect(url_for('index'))
     
-    result = executor.execute(f'SELECT * FROM tasks WHERE id = {task_id}')
+    result = executor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
     if not result.rows:
         flash('Task not found', 'error')
         return redirect(url_for('index'))
@@ -87,7 +87,7 @@ def edit_task(task_id):
 def delete_task(task_id):
     """Delete a task."""
     try:
-        executor.execute(f'DELETE FROM tasks WHERE id = {task_id}')
+        executor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
         flash('Task deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error: {e}', 'error')
@@ -98,7 +98,7 @@ def delete_task(task_id):
 def complete_task(task_id):
     """Mark task as complete."""
     try:
-        executor.execute(f"UPDATE tasks SET status = 'completed' WHERE id = {task_id}")
+        executor.execute("UPDATE tasks SET status = 'completed' WHERE id = ?", (task_id,))
         flash('Task marked as complete!', 'success')
     except Exception as e:
         flash(f'Error: {e}', 'error')
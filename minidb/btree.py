@@ -1,114 +1,88 @@
-"""B-Tree implementation for database indexing."""
+"""Hash-backed index for database columns."""
 
-class BTreeNode:
-    def __init__(self, leaf=True):
-        self.keys = []
-        self.values = []  # Row IDs for leaf nodes
-        self.children = []
-        self.leaf = leaf
+import bisect
+from array import array
 
 class BTree:
-    """Simple B-Tree for indexing. Stores key -> set of row_ids."""
-    
-    def __init__(self, order=4):
-        self.root = BTreeNode()
-        self.order = order  # Max children per node
-    
+    """Equality index. Maps each key to the row_ids holding it.
+
+    Keeps the historical ``BTree`` name and interface so the engine does not
+    need to know how entries are laid out. Every lookup the executor does is
+    an equality probe, which a dict answers in O(1) without any Python-level
+    node walking.
+
+    A unique index stores the single row_id for a key as a bare int. Other
+    indexes keep a sorted ``array('Q')`` of row_ids per key, which is far
+    smaller than a set of int objects.
+    """
+
+    def __init__(self, unique=False):
+        self._entries = {}
+        self.unique = unique
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
     def insert(self, key, row_id):
         """Insert a key-rowid pair into the index."""
-        root = self.root
-        if len(root.keys) == self.order - 1:
-            new_root = BTreeNode(leaf=False)
-            new_root.children.append(self.root)
-            self._split_child(new_root, 0)
-            self.root = new_root
-        self._insert_non_full(self.root, key, row_id)
-    
-    def _insert_non_full(self, node, key, row_id):
-        i = len(node.keys) - 1
-        if node.leaf:
-            # Find position and insert
-            while i >= 0 and key < node.keys[i]:
-                i -= 1
-            i += 1
-            if i < len(node.keys) and node.keys[i] == key:
-                # Key exists, add row_id to set
-                node.values[i].add(row_id)
-            else:
-                node.keys.insert(i, key)
-                node.values.insert(i, {row_id})
-        else:
-            while i >= 0 and key < node.keys[i]:
-                i -= 1
-            i += 1
-            if len(node.children[i].keys) == self.order - 1:
-                self._split_child(node, i)
-                if key > node.keys[i]:
-                    i += 1
-            self._insert_non_full(node.children[i], key, row_id)
+        if self.unique:
+            self._entries[key] = row_id
+            return
+        row_ids = self._entries.get(key)
+        if row_ids is None:
+            self._entries[key] = array('Q', (row_id,))
+            return
+        i = bisect.bisect_left(row_ids, row_id)
+        if i == len(row_ids) or row_ids[i] != row_id:
+            row_ids.insert(i, row_id)
 
-    def _split_child(self, parent, i):
-        order = self.order
-        child = parent.children[i]
-        mid = order // 2
-        
-        new_node = BTreeNode(leaf=child.leaf)
-        new_node.keys = child.keys[mid + 1:]
-        new_node.values = child.values[mid + 1:]
-        
-        if not child.leaf:
-            new_node.children = child.children[mid + 1:]
-            child.children = child.children[:mid + 1]
-        
-        parent.keys.insert(i, child.keys[mid])
-        parent.values.insert(i, child.values[mid])
-        parent.children.insert(i + 1, new_node)
-        
-        child.keys = child.keys[:mid]
-        child.values = child.values[:mid]
-    
     def search(self, key):
         """Search for a key and return set of row_ids."""
-        return self._search(self.root, key)
-    
-    def _search(self, node, key):
-        i = 0
-        while i < len(node.keys) and key > node.keys[i]:
-            i += 1
-        if i < len(node.keys) and key == node.keys[i]:
-            return node.values[i].copy()
-        if node.leaf:
+        try:
+            entry = self._entries.get(key)
+        except TypeError:
+            # Unhashable keys can never equal a stored value
             return set()
-        return self._search(node.children[i], key)
-    
+        if entry is None:
+            return set()
+        if self.unique:
+            return {entry}
+        return set(entry)
+
+    def row_ids(self, key):
+        """Return the row_ids for a key without copying them.
+
+        The result may be the index's own storage and must not be modified.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return ()
+        if self.unique:
+            return (entry,)
+        return entry
+
     def delete(self, key, row_id):
-        """Remove a row_id from a key's set."""
-        self._delete(self.root, key, row_id)
-    
-    def _delete(self, node, key, row_id):
-        i = 0
-        while i < len(node.keys) and key > node.keys[i]:
-            i += 1
-        if i < len(node.keys) and key == node.keys[i]:
-            if row_id in node.values[i]:
-                node.values[i].discard(row_id)
-                if not node.values[i]:
-                    node.keys.pop(i)
-                    node.values.pop(i)
+        """Remove a row_id from a key's entry."""
+        entry = self._entries.get(key)
+        if entry is None:
             return
-        if not node.leaf:
-            self._delete(node.children[i], key, row_id)
-    
+        if self.unique:
+            if entry == row_id:
+                del self._entries[key]
+            return
+        i = bisect.bisect_left(entry, row_id)
+        if i < len(entry) and entry[i] == row_id:
+            del entry[i]
+            if not entry:
+                del self._entries[key]
+
+    def keys(self):
+        """Return a view of the indexed keys."""
+        return self._entries.keys()
+
     def all_entries(self):
         """Return all (key, row_ids) pairs."""
-        result = []
-        self._collect(self.root, result)
-        return result
-    
-    def _collect(self, node, result):
-        for i, key in enumerate(node.keys):
-            if node.leaf:
-                result.append((key, node.values[i].copy()))
-        if not node.leaf:
-            for child in node.children:
-                self._collect(child, result)
+        return [(key, self.search(key)) for key in self._entries]
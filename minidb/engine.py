@@ -1,9 +1,79 @@
 """Core database engine with storage and indexing."""
 
+import atexit
 import json
+import math
 import os
-from typing import Any, Dict, List, Optional, Set
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from .btree import BTree
+from .io_backend import write_all
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+def _has_nonfinite(obj: Any) -> bool:
+    """Return True if obj holds an inf or nan float anywhere."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_nonfinite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_nonfinite(v) for v in obj)
+    return False
+
+try:
+    import orjson
+
+    # orjson only handles 64-bit integers: it refuses to encode larger ones
+    # and decodes them as floats. It also writes inf and nan as null.
+    # Anything that may hold such values goes through the json module
+    # instead, which round-trips them (as Infinity and NaN).
+    _NEEDS_JSON = re.compile(rb'\d{19}|NaN|Infinity')
+
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except orjson.JSONEncodeError:
+            return _json_dumps(obj, indent)
+        # Non-finite floats come out as null, so only then look for them
+        if b'null' in data and _has_nonfinite(obj):
+            return _json_dumps(obj, indent)
+        return data
+
+    def _loads(data: bytes) -> Any:
+        if _NEEDS_JSON.search(data):
+            return json.loads(data)
+        return orjson.loads(data)
+except ImportError:
+    _dumps = _json_dumps
+    _loads = json.loads
+
+# Seconds to wait after the first unsaved change before writing to disk
+SAVE_DELAY = 0.1
+
+# Compact once the change log grows past this multiple of the snapshot size
+COMPACT_RATIO = 4
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes')
+    return bool(value)
+
+def _identity(value: Any) -> Any:
+    return value
+
+# Value converter for each column type
+CONVERTERS = {
+    'INTEGER': int,
+    'FLOAT': float,
+    'TEXT': str,
+    'BOOLEAN': _to_bool,
+}
 
 class Column:
     def __init__(self, name: str, dtype: str, primary_key: bool = False,
@@ -13,20 +83,36 @@ class Column:
         self.primary_key = primary_key
         self.unique = unique or primary_key
         self.not_null = not_null or primary_key
+        self.convert = CONVERTERS.get(self.dtype, _identity)
 
 class Table:
+    """A table whose rows are stored as tuples ordered like column_order."""
+    
     def __init__(self, name: str, columns: List[Column]):
         self.name = name
         self.columns = {col.name: col for col in columns}
         self.column_order = [col.name for col in columns]
-        self.rows: Dict[int, Dict[str, Any]] = {}
+        self.col_index = {col.name: i for i, col in enumerate(columns)}
+        self.rows: Dict[int, Tuple] = {}
         self.next_row_id = 1
         self.indexes: Dict[str, BTree] = {}
+        self.primary_key = next((col.name for col in columns if col.primary_key), None)
+        self._pk_max = None
+        # Called as on_change(table_name, op, row_id, row_dict) after each change
+        self.on_change: Optional[Callable] = None
         
         # Create indexes for primary key and unique columns
         for col in columns:
             if col.primary_key or col.unique:
-                self.indexes[col.name] = BTree()
+                self.indexes[col.name] = BTree(unique=True)
+    
+    def row_dict(self, row: Tuple) -> Dict[str, Any]:
+        """Return a stored row as a column name -> value dict."""
+        return dict(zip(self.column_order, row))
+    
+    def row_from_dict(self, values: Dict[str, Any]) -> Tuple:
+        """Build a stored row from a column name -> value dict."""
+        return tuple(values.get(col_name) for col_name in self.column_order)
     
     def validate_value(self, col_name: str, value: Any) -> Any:
         """Validate and convert value to correct type."""
@@ -38,25 +124,13 @@ class Table:
             return None
         
         try:
-            if col.dtype == 'INTEGER':
-                return int(value)
-            elif col.dtype == 'FLOAT':
-                return float(value)
-            elif col.dtype == 'TEXT':
-                return str(value)
-            elif col.dtype == 'BOOLEAN':
-                if isinstance(value, bool):
-                    return value
-                if isinstance(value, str):
-                    return value.lower() in ('true', '1', 'yes')
-                return bool(value)
+            return col.convert(value)
         except (ValueError, TypeError):
             raise ValueError(f"Invalid value '{value}' for {col.dtype} column '{col_name}'")
-        return value
 
     def insert(self, values: Dict[str, Any]) -> int:
         """Insert a row and return its row_id."""
-        row = {}
+        row = []
         for col_name in self.column_order:
             col = self.columns[col_name]
             value = values.get(col_name)
@@ -65,20 +139,16 @@ class Table:
             # Check unique constraint
             if col.unique and validated is not None:
                 if col_name in self.indexes:
-                    existing = self.indexes[col_name].search(validated)
-                    if existing:
+                    if validated in self.indexes[col_name]:
                         raise ValueError(f"Duplicate value '{validated}' for unique column '{col_name}'")
-            row[col_name] = validated
+            row.append(validated)
         
+        row = tuple(row)
         row_id = self.next_row_id
-        self.next_row_id += 1
-        self.rows[row_id] = row
-        
-        # Update indexes
-        for col_name, index in self.indexes.items():
-            if row[col_name] is not None:
-                index.insert(row[col_name], row_id)
-        
+        # Log before changing anything, so a failure to record the change
+        # leaves the table untouched
+        self._notify('insert', row_id, row)
+        self._store(row_id, row)
         return row_id
     
     def update(self, row_id: int, values: Dict[str, Any]):
@@ -87,46 +157,83 @@ class Table:
             raise ValueError(f"Row {row_id} not found")
         
         old_row = self.rows[row_id]
-        new_row = old_row.copy()
+        new_row = list(old_row)
         
         for col_name, value in values.items():
             if col_name not in self.columns:
                 raise ValueError(f"Unknown column '{col_name}'")
             col = self.columns[col_name]
+            pos = self.col_index[col_name]
             validated = self.validate_value(col_name, value)
             
             # Check unique constraint
-            if col.unique and validated is not None and validated != old_row.get(col_name):
+            if col.unique and validated is not None and validated != old_row[pos]:
                 if col_name in self.indexes:
-                    existing = self.indexes[col_name].search(validated)
-                    if existing:
+                    if validated in self.indexes[col_name]:
                         raise ValueError(f"Duplicate value '{validated}' for unique column '{col_name}'")
-            new_row[col_name] = validated
-        
-        # Update indexes
-        for col_name, index in self.indexes.items():
-            old_val = old_row.get(col_name)
-            new_val = new_row.get(col_name)
-            if old_val != new_val:
-                if old_val is not None:
-                    index.delete(old_val, row_id)
-                if new_val is not None:
-                    index.insert(new_val, row_id)
+            new_row[pos] = validated
         
-        self.rows[row_id] = new_row
+        new_row = tuple(new_row)
+        self._notify('update', row_id, new_row)
+        self._store(row_id, new_row)
     
     def delete(self, row_id: int):
         """Delete a row by row_id."""
         if row_id not in self.rows:
             return
-        row = self.rows[row_id]
-        
-        # Update indexes
+        self._notify('delete', row_id)
+        self._remove(row_id)
+    
+    def _store(self, row_id: int, row: Tuple):
+        """Put an already validated row in place and update indexes."""
+        old_row = self.rows.get(row_id)
         for col_name, index in self.indexes.items():
-            if row.get(col_name) is not None:
-                index.delete(row[col_name], row_id)
+            pos = self.col_index[col_name]
+            new_val = row[pos]
+            if old_row is not None:
+                old_val = old_row[pos]
+                if old_val is not None and old_val != new_val:
+                    index.delete(old_val, row_id)
+            # Insert even when the value is unchanged: while the log is
+            # replayed over a snapshot that already contains it, an older
+            # entry may have pointed this key at another row
+            if new_val is not None:
+                index.insert(new_val, row_id)
+        
+        self.rows[row_id] = row
+        if row_id >= self.next_row_id:
+            self.next_row_id = row_id + 1
         
-        del self.rows[row_id]
+        if self.primary_key is not None:
+            pos = self.col_index[self.primary_key]
+            old_pk = old_row[pos] if old_row is not None else None
+            new_pk = row[pos]
+            if old_pk is not None and old_pk == self._pk_max and new_pk != old_pk:
+                self._recompute_pk_max()
+            elif new_pk is not None and (self._pk_max is None or new_pk > self._pk_max):
+                self._pk_max = new_pk
+    
+    def _remove(self, row_id: int):
+        """Drop a row and its index entries."""
+        row = self.rows.pop(row_id)
+        for col_name, index in self.indexes.items():
+            value = row[self.col_index[col_name]]
+            if value is not None:
+                index.delete(value, row_id)
+        if self.primary_key is not None and row[self.col_index[self.primary_key]] == self._pk_max:
+            self._recompute_pk_max()
+    
+    def _recompute_pk_max(self):
+        self._pk_max = max(self.indexes[self.primary_key].keys(), default=None)
+    
+    def max_primary_key(self) -> Any:
+        """Return the largest primary key value, or None if the table is empty."""
+        return self._pk_max
+    
+    def _notify(self, op: str, row_id: int, row: Tuple = None):
+        if self.on_change is not None:
+            self.on_change(self.name, op, row_id,
+                           self.row_dict(row) if row is not None else None)
     
     def get_row_ids_by_index(self, col_name: str, value: Any) -> Set[int]:
         """Get row IDs using index lookup."""
@@ -135,26 +242,72 @@ class Table:
         return None  # No index available
 
 
+def _column_defs(table: Table) -> List[Dict[str, Any]]:
+    """Describe a table's columns as JSON-ready dicts."""
+    return [
+        {
+            'name': col.name,
+            'dtype': col.dtype,
+            'primary_key': col.primary_key,
+            'unique': col.unique,
+            'not_null': col.not_null
+        }
+        for col in [table.columns[n] for n in table.column_order]
+    ]
+
+def _columns_from_defs(defs: List[Dict[str, Any]]) -> List[Column]:
+    return [
+        Column(
+            c['name'], c['dtype'], c['primary_key'],
+            c['unique'], c['not_null']
+        )
+        for c in defs
+    ]
+
+
 class Database:
+    """In-memory tables persisted as a JSON snapshot plus a change log.
+
+    Row changes, table creations and drops are appended to ``<path>.log``
+    as one JSON object per line.
+    Loading reads the snapshot and replays the log on top of it. Once the
+    log outgrows the snapshot by COMPACT_RATIO, or the schema changes, the
+    snapshot is rewritten and the log truncated.
+    """
+    
     def __init__(self, path: str = None):
         self.tables: Dict[str, Table] = {}
         self.path = path
-        if path and os.path.exists(path):
+        self.log_path = path + '.log' if path else None
+        self.lock = threading.RLock()
+        self._pending: List[bytes] = []
+        self._needs_snapshot = False
+        self._save_scheduled = False
+        self._batch_depth = 0
+        if path and (os.path.exists(path) or os.path.exists(self.log_path)):
             self.load()
+        if path:
+            atexit.register(self.flush)
     
     def create_table(self, name: str, columns: List[Column]):
         """Create a new table."""
         if name in self.tables:
             raise ValueError(f"Table '{name}' already exists")
-        self.tables[name] = Table(name, columns)
-        self.save()
+        table = Table(name, columns)
+        self._queue({'op': 'create', 'table': name, 'columns': _column_defs(table)})
+        table.on_change = self._record
+        self.tables[name] = table
+        self._needs_snapshot = True
+        self.mark_dirty()
     
     def drop_table(self, name: str):
         """Drop a table."""
         if name not in self.tables:
             raise ValueError(f"Table '{name}' does not exist")
+        self._queue({'op': 'drop', 'table': name})
         del self.tables[name]
-        self.save()
+        self._needs_snapshot = True
+        self.mark_dirty()
     
     def get_table(self, name: str) -> Table:
         """Get a table by name."""
@@ -162,56 +315,160 @@ class Database:
             raise ValueError(f"Table '{name}' does not exist")
         return self.tables[name]
     
-    def save(self):
-        """Persist database to disk."""
+    def _record(self, table_name: str, op: str, row_id: int,
+                row: Optional[Dict[str, Any]]):
+        """Queue a change log entry for a row change."""
+        entry = {'op': op, 'table': table_name, 'row_id': row_id}
+        if row is not None:
+            entry['row'] = row
+        self._queue(entry)
+    
+    def _queue(self, entry: Dict[str, Any]):
         if not self.path:
             return
-        
+        with self.lock:
+            self._pending.append(_dumps(entry) + b'\n')
+            self.mark_dirty()
+    
+    def mark_dirty(self):
+        """Schedule pending changes to be written to disk.
+
+        Changes made within SAVE_DELAY seconds of each other are written
+        together, so bulk modifications cost one write instead of one each.
+        """
+        if not self.path:
+            return
+        with self.lock:
+            if self._save_scheduled or self._batch_depth:
+                return
+            self._save_scheduled = True
+            timer = threading.Timer(SAVE_DELAY, self.flush)
+            timer.daemon = True
+            timer.start()
+    
+    def flush(self):
+        """Write pending changes to disk immediately."""
+        if not self.path:
+            return
+        with self.lock:
+            self._save_scheduled = False
+            if self._needs_snapshot:
+                self.compact()
+            elif self._pending:
+                self._append_log()
+                snapshot_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+                if os.path.getsize(self.log_path) > COMPACT_RATIO * snapshot_size:
+                    self.compact()
+    
+    @contextmanager
+    def transaction(self):
+        """Hold back writes until the block exits, then write once."""
+        with self.lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self.flush()
+    
+    def compact(self):
+        """Rewrite the snapshot and truncate the change log."""
+        if not self.path:
+            return
+        with self.lock:
+            # Log everything first. If we crash before truncating, the log is
+            # replayed over a snapshot that already includes it. That ends in
+            # the same state: table drops and creations are logged, and
+            # _store re-inserts every index entry.
+            self._append_log()
+            self._write_snapshot()
+            open(self.log_path, 'w').close()
+            self._needs_snapshot = False
+    
+    def _append_log(self):
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            write_all(fd, self._pending)
+        finally:
+            os.close(fd)
+        self._pending = []
+    
+    def save(self):
+        """Write the whole database to disk as a fresh snapshot."""
+        self.compact()
+    
+    def _write_snapshot(self):
         data = {}
         for table_name, table in self.tables.items():
             data[table_name] = {
-                'columns': [
-                    {
-                        'name': col.name,
-                        'dtype': col.dtype,
-                        'primary_key': col.primary_key,
-                        'unique': col.unique,
-                        'not_null': col.not_null
-                    }
-                    for col in [table.columns[n] for n in table.column_order]
-                ],
-                'rows': {str(k): v for k, v in table.rows.items()},
+                'columns': _column_defs(table),
+                'rows': {str(k): table.row_dict(v) for k, v in table.rows.items()},
                 'next_row_id': table.next_row_id
             }
         
         os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
-        with open(self.path, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Write to a temporary file first so a crash never leaves a
+        # half-written database behind.
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(data, indent=True))
+        os.replace(tmp_path, self.path)
     
     def load(self):
-        """Load database from disk."""
-        if not self.path or not os.path.exists(self.path):
+        """Load the snapshot from disk and replay the change log."""
+        if not self.path:
             return
         
-        with open(self.path, 'r') as f:
-            data = json.load(f)
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                data = _loads(f.read())
         
         for table_name, table_data in data.items():
-            columns = [
-                Column(
-                    c['name'], c['dtype'], c['primary_key'],
-                    c['unique'], c['not_null']
-                )
-                for c in table_data['columns']
-            ]
-            table = Table(table_name, columns)
-            table.next_row_id = table_data['next_row_id']
+            table = Table(table_name, _columns_from_defs(table_data['columns']))
             
             for row_id_str, row in table_data['rows'].items():
-                row_id = int(row_id_str)
-                table.rows[row_id] = row
-                for col_name, index in table.indexes.items():
-                    if row.get(col_name) is not None:
-                        index.insert(row[col_name], row_id)
+                table._store(int(row_id_str), table.row_from_dict(row))
+            table.next_row_id = max(table.next_row_id, table_data['next_row_id'])
             
             self.tables[table_name] = table
+        
+        if not self._replay_log():
+            # Start a fresh log rather than appending after a torn entry
+            self.compact()
+        for table in self.tables.values():
+            table.on_change = self._record
+    
+    def _replay_log(self) -> bool:
+        """Apply logged changes. Returns False if the log ends in a torn write."""
+        if not os.path.exists(self.log_path):
+            return True
+        
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = _loads(line)
+                except ValueError:
+                    return False
+                op = entry['op']
+                if op == 'create':
+                    self.tables[entry['table']] = Table(
+                        entry['table'], _columns_from_defs(entry['columns']))
+                    continue
+                if op == 'drop':
+                    self.tables.pop(entry['table'], None)
+                    continue
+                table = self.tables.get(entry['table'])
+                if table is None:
+                    continue
+                row_id = entry['row_id']
+                if op == 'delete':
+                    if row_id in table.rows:
+                        table._remove(row_id)
+                else:
+                    table._store(row_id, table.row_from_dict(entry['row']))
+        return True
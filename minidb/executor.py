@@ -1,12 +1,49 @@
 """Query execution engine."""
 
-from typing import Any, Dict, List, Optional
+import functools
+import heapq
+import operator
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from .engine import Database, Column, Table
 from .parser import (
-    parse_sql, CreateTableStmt, DropTableStmt, InsertStmt,
-    SelectStmt, UpdateStmt, DeleteStmt
+    parse_sql, bind_params, normalize_literals, CreateTableStmt, DropTableStmt, InsertStmt,
+    SelectStmt, UpdateStmt, DeleteStmt, Compare, BinOp, Condition, Op
 )
 
+# Maximum number of SELECT results kept per executor
+SELECT_CACHE_SIZE = 128
+
+# Python implementations of the WHERE comparison operators, indexed by Op
+COMPARATORS = (
+    operator.eq,  # Op.EQ
+    operator.ne,  # Op.NE
+    operator.lt,  # Op.LT
+    operator.le,  # Op.LE
+    operator.gt,  # Op.GT
+    operator.ge,  # Op.GE
+)
+
+# Parsed statements are never mutated by the executor, so one AST can be
+# shared by every execution of the same SQL text.
+_parse_template = functools.lru_cache(maxsize=512)(parse_sql)
+
+@functools.lru_cache(maxsize=512)
+def _parse_sql_cached(sql: str):
+    """Parse sql, sharing one parsed template between statements that only
+    differ in their literal values."""
+    if '?' in sql:
+        return _parse_template(sql)
+    template, values = normalize_literals(sql)
+    if not values:
+        return _parse_template(sql)
+    try:
+        return bind_params(_parse_template(template), values)
+    except (SyntaxError, ValueError):
+        # The template does not fit; report the error against the statement
+        # as written
+        return parse_sql(sql)
+
 class QueryResult:
     def __init__(self, columns: List[str] = None, rows: List[Dict] = None,
                  message: str = None, affected: int = 0):
@@ -21,35 +58,95 @@ class QueryResult:
         if not self.rows:
             return "Empty result set"
         
-        # Format as table
-        col_widths = {col: len(col) for col in self.columns}
-        for row in self.rows:
-            for col in self.columns:
-                val = str(row.get(col, 'NULL'))
-                col_widths[col] = max(col_widths[col], len(val))
+        # Format as table, stringifying each cell once
+        columns = self.columns
+        str_rows = [[str(row.get(col, 'NULL')) for col in columns] for row in self.rows]
+        widths = [
+            max(len(col), max((len(cells[j]) for cells in str_rows), default=0))
+            for j, col in enumerate(columns)
+        ]
         
         lines = []
-        header = ' | '.join(col.ljust(col_widths[col]) for col in self.columns)
+        header = ' | '.join([col.ljust(w) for col, w in zip(columns, widths)])
         lines.append(header)
         lines.append('-' * len(header))
         
-        for row in self.rows:
-            line = ' | '.join(
-                str(row.get(col, 'NULL')).ljust(col_widths[col])
-                for col in self.columns
-            )
-            lines.append(line)
+        for cells in str_rows:
+            lines.append(' | '.join([cell.ljust(w) for cell, w in zip(cells, widths)]))
         
         lines.append(f"\n({len(self.rows)} rows)")
         return '\n'.join(lines)
 
+class _ColumnResolver(dict):
+    """Joined row keyed by qualified ``table.column`` names.
+
+    Unqualified names resolve to the last joined table that has the column,
+    so each value is stored once rather than under both spellings.
+    """
+    __slots__ = ('_tables',)
+    
+    def __init__(self, tables: Tuple[str, ...], values):
+        super().__init__(values)
+        self._tables = tables
+    
+    def __missing__(self, key: str) -> Any:
+        if '.' not in key:
+            for table in reversed(self._tables):
+                qualified = f"{table}.{key}"
+                if qualified in self:
+                    return dict.__getitem__(self, qualified)
+        raise KeyError(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
 class Executor:
     def __init__(self, db: Database):
         self.db = db
+        # (sql, params) -> (table versions at execution time, result)
+        self._select_cache: OrderedDict = OrderedDict()
+        self._table_version: Dict[str, int] = defaultdict(int)
+    
+    def execute(self, sql: str, params: Sequence = ()) -> QueryResult:
+        """Execute SQL and return result.
+
+        ``?`` placeholders in sql are bound, in order, to the values in
+        params, so callers never need to quote values into the SQL text.
+
+        SELECT results are cached by SQL text and parameters and reused
+        until one of the tables they read is modified through this
+        executor. Cached results are shared between callers and must be
+        treated as read-only.
+        """
+        with self.db.lock:
+            return self._execute(sql, tuple(params))
     
-    def execute(self, sql: str) -> QueryResult:
-        """Execute SQL and return result."""
-        stmt = parse_sql(sql)
+    def _execute(self, sql: str, params: Tuple) -> QueryResult:
+        cache_key = (sql, params)
+        try:
+            cached = self._select_cache.get(cache_key)
+        except TypeError:
+            # Unhashable parameters: run the statement without the cache
+            cache_key = cached = None
+        if cached is not None:
+            versions, result = cached
+            if all(self._table_version[name] == v for name, v in versions):
+                self._select_cache.move_to_end(cache_key)
+                return result
+            del self._select_cache[cache_key]
+        
+        stmt = _parse_sql_cached(sql)
+        if params or '?' in sql:
+            stmt = bind_params(stmt, params)
+        
+        if isinstance(stmt, SelectStmt):
+            result = self.exec_select(stmt)
+            if cache_key is not None:
+                self._cache_select(cache_key, stmt, result)
+            return result
         
         if isinstance(stmt, CreateTableStmt):
             return self.exec_create(stmt)
@@ -57,8 +154,6 @@ class Executor:
             return self.exec_drop(stmt)
         elif isinstance(stmt, InsertStmt):
             return self.exec_insert(stmt)
-        elif isinstance(stmt, SelectStmt):
-            return self.exec_select(stmt)
         elif isinstance(stmt, UpdateStmt):
             return self.exec_update(stmt)
         elif isinstance(stmt, DeleteStmt):
@@ -66,6 +161,17 @@ class Executor:
         
         raise ValueError(f"Unknown statement type: {type(stmt)}")
 
+    def _cache_select(self, cache_key: Tuple, stmt: SelectStmt, result: QueryResult):
+        tables = [stmt.table_name] + [join['table'] for join in stmt.joins]
+        versions = tuple((name, self._table_version[name]) for name in tables)
+        self._select_cache[cache_key] = (versions, result)
+        if len(self._select_cache) > SELECT_CACHE_SIZE:
+            self._select_cache.popitem(last=False)
+
+    def _invalidate(self, table_name: str):
+        """Mark cached SELECT results that read table_name as stale."""
+        self._table_version[table_name] += 1
+
     def exec_create(self, stmt: CreateTableStmt) -> QueryResult:
         columns = [
             Column(
@@ -74,15 +180,18 @@ class Executor:
             )
             for c in stmt.columns
         ]
+        self._invalidate(stmt.table_name)
         self.db.create_table(stmt.table_name, columns)
         return QueryResult(message=f"Table '{stmt.table_name}' created")
     
     def exec_drop(self, stmt: DropTableStmt) -> QueryResult:
+        self._invalidate(stmt.table_name)
         self.db.drop_table(stmt.table_name)
         return QueryResult(message=f"Table '{stmt.table_name}' dropped")
     
     def exec_insert(self, stmt: InsertStmt) -> QueryResult:
         table = self.db.get_table(stmt.table_name)
+        self._invalidate(stmt.table_name)
         
         if stmt.columns:
             values = dict(zip(stmt.columns, stmt.values))
@@ -90,7 +199,6 @@ class Executor:
             values = dict(zip(table.column_order, stmt.values))
         
         table.insert(values)
-        self.db.save()
         return QueryResult(message="1 row inserted", affected=1)
     
     def exec_select(self, stmt: SelectStmt) -> QueryResult:
@@ -102,8 +210,10 @@ class Executor:
         else:
             row_ids = set(table.rows.keys())
         
-        # Handle JOINs
-        if stmt.joins:
+        # Handle JOINs. Without them, results stay as stored tuples until
+        # after ORDER BY and LIMIT, so only returned rows become dicts.
+        joined = bool(stmt.joins)
+        if joined:
             results = self.execute_joins(table, stmt.joins, row_ids, stmt.where)
         else:
             results = [table.rows[rid] for rid in row_ids]
@@ -117,20 +227,45 @@ class Executor:
         else:
             columns = stmt.columns
         
-        # Order results
-        if stmt.order_by:
-            for col, direction in reversed(stmt.order_by):
-                reverse = direction == 'DESC'
-                results.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=reverse)
+        # Order and limit results
+        if stmt.order_by and stmt.limit and len(stmt.order_by) == 1:
+            # Only the top rows are needed, so keep a bounded heap instead
+            # of sorting the whole result
+            col, direction = stmt.order_by[0]
+            select = heapq.nlargest if direction == 'DESC' else heapq.nsmallest
+            results = select(stmt.limit, results,
+                             key=self._sort_key(table, col, joined))
+        else:
+            if stmt.order_by:
+                for col, direction in reversed(stmt.order_by):
+                    reverse = direction == 'DESC'
+                    results.sort(key=self._sort_key(table, col, joined), reverse=reverse)
+            if stmt.limit:
+                results = results[:stmt.limit]
         
-        # Apply limit
-        if stmt.limit:
-            results = results[:stmt.limit]
+        if not joined:
+            results = [table.row_dict(row) for row in results]
         
         return QueryResult(columns=columns, rows=results)
 
+    def _sort_key(self, table: Table, col: str, joined: bool):
+        """Return an ORDER BY key function that sorts NULLs last."""
+        if joined:
+            def key(r):
+                value = r.get(col)
+                return (value is None, value)
+            return key
+        pos = table.col_index.get(col)
+        if pos is None:
+            return lambda r: (True, None)
+        def key(r):
+            value = r[pos]
+            return (value is None, value)
+        return key
+
     def exec_update(self, stmt: UpdateStmt) -> QueryResult:
         table = self.db.get_table(stmt.table_name)
+        self._invalidate(stmt.table_name)
         
         if stmt.where:
             row_ids = self.filter_rows(table, stmt.where)
@@ -140,11 +275,11 @@ class Executor:
         for rid in row_ids:
             table.update(rid, stmt.assignments)
         
-        self.db.save()
         return QueryResult(message=f"{len(row_ids)} row(s) updated", affected=len(row_ids))
     
     def exec_delete(self, stmt: DeleteStmt) -> QueryResult:
         table = self.db.get_table(stmt.table_name)
+        self._invalidate(stmt.table_name)
         
         if stmt.where:
             row_ids = self.filter_rows(table, stmt.where)
@@ -154,99 +289,149 @@ class Executor:
         for rid in list(row_ids):
             table.delete(rid)
         
-        self.db.save()
         return QueryResult(message=f"{len(row_ids)} row(s) deleted", affected=len(row_ids))
     
-    def filter_rows(self, table: Table, condition: Dict) -> set:
+    def filter_rows(self, table: Table, condition: Condition) -> set:
         """Filter rows based on WHERE condition."""
-        if 'column' in condition:
+        if isinstance(condition, Compare):
             return self.eval_comparison(table, condition)
         
         # AND/OR
-        op = condition['op']
-        left = self.filter_rows(table, condition['left'])
-        right = self.filter_rows(table, condition['right'])
+        op = condition.op
+        if op == Op.AND:
+            narrowed = self._filter_by_index_first(table, condition)
+            if narrowed is not None:
+                return narrowed
+        
+        left = self.filter_rows(table, condition.left)
+        right = self.filter_rows(table, condition.right)
         
-        if op == 'AND':
+        if op == Op.AND:
             return left & right
         else:  # OR
             return left | right
     
-    def eval_comparison(self, table: Table, cond: Dict) -> set:
+    def _filter_by_index_first(self, table: Table, condition: Condition) -> Optional[set]:
+        """Evaluate an AND chain starting from its cheapest index probe.
+
+        If any conjunct is an equality on an indexed column, probe the
+        indexes, keep the smallest candidate set and check the remaining
+        conjuncts row by row, so they never need a full scan. Returns None
+        when no conjunct can use an index.
+        """
+        conjuncts = []
+        pending = [condition]
+        while pending:
+            cond = pending.pop()
+            if isinstance(cond, BinOp) and cond.op == Op.AND:
+                pending.append(cond.right)
+                pending.append(cond.left)
+            else:
+                conjuncts.append(cond)
+        
+        best = None
+        for i, cond in enumerate(conjuncts):
+            if isinstance(cond, Compare) and cond.op == Op.EQ and cond.column in table.indexes:
+                row_ids = self.eval_comparison(table, cond)
+                if best is None or len(row_ids) < len(best[1]):
+                    best = (i, row_ids)
+        if best is None:
+            return None
+        
+        probe_pos, candidates = best
+        rest = conjuncts[:probe_pos] + conjuncts[probe_pos + 1:]
+        return {
+            rid for rid in candidates
+            if all(self._row_matches(table, table.rows[rid], cond) for cond in rest)
+        }
+    
+    def _row_matches(self, table: Table, row: tuple, condition: Condition) -> bool:
+        """Evaluate a WHERE condition against one stored row."""
+        if isinstance(condition, Compare):
+            pos = table.col_index.get(condition.column)
+            if pos is None:
+                return False
+            return self.compare(row[pos], condition.op, condition.value)
+        
+        left = self._row_matches(table, row, condition.left)
+        if condition.op == Op.AND:
+            return left and self._row_matches(table, row, condition.right)
+        return left or self._row_matches(table, row, condition.right)
+    
+    def eval_comparison(self, table: Table, cond: Compare) -> set:
         """Evaluate a single comparison."""
-        col = cond['column']
-        op = cond['op']
-        value = cond['value']
+        col = cond.column
+        op = cond.op
+        value = cond.value
         
         # Try index lookup for equality
-        if op == '=' and col in table.indexes:
-            return table.get_row_ids_by_index(col, value) or set()
+        if op == Op.EQ and col in table.indexes:
+            return table.get_row_ids_by_index(col, value)
         
-        # Full scan
+        # Full scan, resolving the operator once rather than per row
+        pos = table.col_index.get(col)
+        if pos is None or value is None:
+            return set()
+        cmp = COMPARATORS[op]
         result = set()
+        add = result.add
         for rid, row in table.rows.items():
-            row_val = row.get(col)
-            if self.compare(row_val, op, value):
-                result.add(rid)
+            row_val = row[pos]
+            if row_val is not None and cmp(row_val, value):
+                add(rid)
         return result
     
-    def compare(self, left: Any, op: str, right: Any) -> bool:
+    def compare(self, left: Any, op: Op, right: Any) -> bool:
         """Compare two values."""
         if left is None or right is None:
             return False
-        
-        if op == '=':
-            return left == right
-        elif op == '!=':
-            return left != right
-        elif op == '<':
-            return left < right
-        elif op == '>':
-            return left > right
-        elif op == '<=':
-            return left <= right
-        elif op == '>=':
-            return left >= right
-        return False
+        return COMPARATORS[op](left, right)
 
     def execute_joins(self, base_table: Table, joins: List[Dict],
-                      base_row_ids: set, where: Optional[Dict]) -> List[Dict]:
+                      base_row_ids: set, where: Optional[Condition]) -> List[Dict]:
         """Execute JOIN operations."""
+        tables = (base_table.name,)
         results = []
         
+        # Prefix columns with table name
+        keys = [f"{base_table.name}.{k}" for k in base_table.column_order]
         for rid in base_row_ids:
-            row = base_table.rows[rid].copy()
-            # Prefix columns with table name
-            prefixed = {f"{base_table.name}.{k}": v for k, v in row.items()}
-            prefixed.update(row)  # Also keep unprefixed
-            results.append(prefixed)
+            results.append(_ColumnResolver(tables, zip(keys, base_table.rows[rid])))
         
         for join in joins:
             join_table = self.db.get_table(join['table'])
-            new_results = []
+            tables = tables + (join['table'],)
+            keys = [f"{join['table']}.{k}" for k in join_table.column_order]
+            left_col = join['left']
+            right_col = join['right']
+            rcol = right_col.split('.', 1)[1] if '.' in right_col else right_col
+            pos = join_table.col_index.get(rcol)
+            
+            # Hash join: probe the column's index if it has one, otherwise
+            # bucket the join table's rows by the join column once
+            index = join_table.indexes.get(rcol)
+            buckets = defaultdict(list)
+            if index is None and pos is not None:
+                for jrow in join_table.rows.values():
+                    key = jrow[pos]
+                    if key is not None:
+                        buckets[key].append(jrow)
             
+            new_results = []
             for result_row in results:
-                left_col = join['left']
-                right_col = join['right']
-                
-                # Get the value to match
                 left_val = result_row.get(left_col)
+                if left_val is None:
+                    continue
+                if index is not None:
+                    matches = [join_table.rows[jrid] for jrid in index.row_ids(left_val)]
+                else:
+                    matches = buckets.get(left_val, ())
                 
-                # Find matching rows in join table
-                for jrid, jrow in join_table.rows.items():
-                    # Determine which column to match
-                    if '.' in right_col:
-                        _, rcol = right_col.split('.', 1)
-                    else:
-                        rcol = right_col
-                    
-                    if jrow.get(rcol) == left_val:
-                        merged = result_row.copy()
-                        # Add join table columns
-                        for k, v in jrow.items():
-                            merged[f"{join['table']}.{k}"] = v
-                            merged[k] = v
-                        new_results.append(merged)
+                for jrow in matches:
+                    merged = _ColumnResolver(tables, result_row)
+                    # Add join table columns
+                    merged.update(zip(keys, jrow))
+                    new_results.append(merged)
             
             results = new_results
         
@@ -256,18 +441,15 @@ class Executor:
         
         return results
     
-    def eval_condition_on_row(self, row: Dict, condition: Dict) -> bool:
+    def eval_condition_on_row(self, row: Dict, condition: Condition) -> bool:
         """Evaluate condition on a single row."""
-        if 'column' in condition:
-            col = condition['column']
-            op = condition['op']
-            value = condition['value']
-            return self.compare(row.get(col), op, value)
+        if isinstance(condition, Compare):
+            return self.compare(row.get(condition.column), condition.op, condition.value)
         
-        op = condition['op']
-        left = self.eval_condition_on_row(row, condition['left'])
-        right = self.eval_condition_on_row(row, condition['right'])
+        op = condition.op
+        left = self.eval_condition_on_row(row, condition.left)
+        right = self.eval_condition_on_row(row, condition.right)
         
-        if op == 'AND':
+        if op == Op.AND:
             return left and right
         return left or right
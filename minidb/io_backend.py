@@ -0,0 +1,54 @@
+"""Batched file writes for the change log."""
+
+import os
+from typing import List
+
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX <= 0:
+    # -1 means the platform sets no fixed limit
+    _IOV_MAX = 1024
+
+
+def _write_buffer(fd: int, buf):
+    """Write one buffer, retrying after short writes."""
+    view = memoryview(buf)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _write_each(fd: int, entries: List[bytes]):
+    for buf in entries:
+        _write_buffer(fd, buf)
+
+
+def _writev_all(fd: int, entries: List[bytes]):
+    i = 0
+    while i < len(entries):
+        batch = entries[i:i + _IOV_MAX]
+        written = os.writev(fd, batch)
+        for buf in batch:
+            if written < len(buf):
+                break
+            written -= len(buf)
+            i += 1
+        else:
+            continue
+        # Short write: finish the partially written buffer and carry on
+        _write_buffer(fd, memoryview(entries[i])[written:])
+        i += 1
+
+
+def write_all(fd: int, entries: List[bytes]):
+    """Write every buffer in entries to fd, in order.
+
+    Uses a single writev() system call per batch where the platform has
+    one, instead of one write() per entry.
+    """
+    if hasattr(os, 'writev'):
+        _writev_all(fd, entries)
+    else:
+        _write_each(fd, entries)
@@ -1,337 +1,408 @@
 """SQL tokenizer and parser."""
 
 import re
-from typing import Any, Dict, List, Optional, Tuple
-from dataclasses import dataclass
+import sys
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, replace
 
 # Token types
-KEYWORDS = {
+KEYWORDS = frozenset({
     'SELECT', 'FROM', 'WHERE', 'INSERT', 'INTO', 'VALUES', 'UPDATE', 'SET',
     'DELETE', 'CREATE', 'TABLE', 'DROP', 'AND', 'OR', 'NOT', 'NULL', 'PRIMARY',
     'KEY', 'UNIQUE', 'INTEGER', 'TEXT', 'FLOAT', 'BOOLEAN', 'JOIN', 'INNER',
     'ON', 'AS', 'ORDER', 'BY', 'ASC', 'DESC', 'LIMIT'
-}
+})
 
-@dataclass
-class Token:
-    type: str
-    value: Any
+# Common spellings of each keyword -> canonical form, so most keywords are
+# classified without allocating an upper-cased copy
+_KW_MAP = {}
+for _kw in KEYWORDS:
+    _KW_MAP[_kw] = _KW_MAP[_kw.lower()] = _KW_MAP[_kw.title()] = _kw
+del _kw
+
+# One alternative per token kind, tried in order. Characters that match no
+# other alternative fall through to SKIP and are ignored. WS swallows whole
+# runs of whitespace and -- line comments in a single match.
+_TOKEN_RE = re.compile(r"""
+    (?P<WS>(?:\s+|--[^\n]*)+)
+  | (?P<STRING>'[^']*'|"[^"]*")
+  | (?P<NUMBER>-?\d+(?:\.\d*)?)
+  | (?P<IDENT>[^\W\d]\w*)
+  | (?P<OP><=|>=|!=|<>|[(),;*=<>!.])
+  | (?P<PARAM>\?)
+  | (?P<UNTERMINATED>['"])
+  | (?P<SKIP>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Tokens are kept as parallel lists of types and values. The types are
+# small ints, so the parser's type checks are plain int compares.
+_T_KEYWORD, _T_IDENT, _T_OP, _T_NUMBER, _T_STRING, _T_PARAM = range(6)
+_TYPE_NAMES = ('KEYWORD', 'IDENT', 'OP', 'NUMBER', 'STRING', 'PARAM')
 
 class Tokenizer:
     def __init__(self, sql: str):
         self.sql = sql
-        self.pos = 0
-        self.tokens = []
+        self.types = []
+        self.values = []
+        self.param_count = 0
     
-    def tokenize(self) -> List[Token]:
-        while self.pos < len(self.sql):
-            self.skip_whitespace()
-            if self.pos >= len(self.sql):
-                break
-            
-            char = self.sql[self.pos]
+    def tokenize(self) -> Tuple[List[int], List[Any]]:
+        """Return the token types and token values as two parallel lists."""
+        # Hot loop: work on locals and store the results once at the end
+        types = []
+        values = []
+        add_type = types.append
+        add_value = values.append
+        kw_get = _KW_MAP.get
+        intern = sys.intern
+        param_count = self.param_count
+        for m in _TOKEN_RE.finditer(self.sql):
+            kind = m.lastgroup
+            if kind == 'WS' or kind == 'SKIP':
+                continue
+            text = m.group()
             
-            if char in '(),;*=<>!.':
-                self.tokens.append(self.read_operator())
-            elif char in ('"', "'"):
-                self.tokens.append(self.read_string())
-            elif char.isdigit() or (char == '-' and self.peek_digit()):
-                self.tokens.append(self.read_number())
-            elif char.isalpha() or char == '_':
-                self.tokens.append(self.read_identifier())
-            else:
-                self.pos += 1
-        
-        return self.tokens
-    
-    def skip_whitespace(self):
-        while self.pos < len(self.sql) and self.sql[self.pos].isspace():
-            self.pos += 1
-    
-    def peek_digit(self) -> bool:
-        return self.pos + 1 < len(self.sql) and self.sql[self.pos + 1].isdigit()
-    
-    def read_operator(self) -> Token:
-        char = self.sql[self.pos]
-        self.pos += 1
-        
-        # Handle two-char operators
-        if self.pos < len(self.sql):
-            two_char = char + self.sql[self.pos]
-            if two_char in ('<=', '>=', '!=', '<>'):
-                self.pos += 1
-                return Token('OP', two_char)
+            if kind == 'IDENT':
+                keyword = kw_get(text)
+                if keyword is None:
+                    keyword = kw_get(text.upper())
+                if keyword is not None:
+                    add_type(_T_KEYWORD)
+                    add_value(keyword)
+                else:
+                    # Identifiers become dict keys downstream; interning
+                    # lets those lookups match on identity
+                    add_type(_T_IDENT)
+                    add_value(intern(text))
+            elif kind == 'OP':
+                add_type(_T_OP)
+                add_value(intern(text))
+            elif kind == 'NUMBER':
+                add_type(_T_NUMBER)
+                add_value(float(text) if '.' in text else int(text))
+            elif kind == 'STRING':
+                add_type(_T_STRING)
+                add_value(text[1:-1])
+            elif kind == 'PARAM':
+                add_type(_T_PARAM)
+                add_value(param_count)
+                param_count += 1
+            else:  # UNTERMINATED
+                raise SyntaxError(f"Unterminated string starting at position {m.start()}")
         
-        return Token('OP', char)
-    
-    def read_string(self) -> Token:
-        quote = self.sql[self.pos]
-        self.pos += 1
-        start = self.pos
-        while self.pos < len(self.sql) and self.sql[self.pos] != quote:
-            self.pos += 1
-        value = self.sql[start:self.pos]
-        self.pos += 1  # Skip closing quote
-        return Token('STRING', value)
-    
-    def read_number(self) -> Token:
-        start = self.pos
-        if self.sql[self.pos] == '-':
-            self.pos += 1
-        while self.pos < len(self.sql) and (self.sql[self.pos].isdigit() or self.sql[self.pos] == '.'):
-            self.pos += 1
-        value = self.sql[start:self.pos]
-        return Token('NUMBER', float(value) if '.' in value else int(value))
-    
-    def read_identifier(self) -> Token:
-        start = self.pos
-        while self.pos < len(self.sql) and (self.sql[self.pos].isalnum() or self.sql[self.pos] == '_'):
-            self.pos += 1
-        value = self.sql[start:self.pos]
-        if value.upper() in KEYWORDS:
-            return Token('KEYWORD', value.upper())
-        return Token('IDENT', value)
+        self.types = types
+        self.values = values
+        self.param_count = param_count
+        return types, values
+
+
+# Literal values as the tokenizer lexes them, for normalize_literals().
+# Digits inside identifiers are skipped, and the row count after LIMIT is
+# matched separately so it stays in the template: the parser reads it as a
+# NUMBER token, not a value. Comments are matched so their contents are left
+# alone.
+_LITERAL_RE = re.compile(r"""
+    (?P<COMMENT>--[^\n]*)
+  | (?P<LIMIT>(?<!\w)LIMIT\s+-?\d+(?:\.\d*)?)
+  | (?P<STRING>'[^']*'|"[^"]*")
+  | (?P<NUMBER>-\d+(?:\.\d*)?|(?<!\w)\d+(?:\.\d*)?)
+""", re.VERBOSE | re.IGNORECASE)
+
+class Op(IntEnum):
+    """WHERE operators. Comparisons come first so they can index a table."""
+    EQ = 0
+    NE = 1
+    LT = 2
+    LE = 3
+    GT = 4
+    GE = 5
+    AND = 6
+    OR = 7
+
+# Operator spelling -> Op
+_OP_MAP = {
+    '=': Op.EQ,
+    '!=': Op.NE,
+    '<>': Op.NE,
+    '<': Op.LT,
+    '<=': Op.LE,
+    '>': Op.GT,
+    '>=': Op.GE,
+    'AND': Op.AND,
+    'OR': Op.OR,
+}
+
+# Binding power of the WHERE connectives
+_PREC = {'OR': 1, 'AND': 2}
+
+# AST nodes are immutable and slotted: parsed statements are cached and
+# shared between executions, and a cached AST has no per-node __dict__.
 
+@dataclass(frozen=True)
+class Param:
+    """A ``?`` placeholder, bound to params[index] at execution time."""
+    __slots__ = ('index',)
+    index: int
 
-@dataclass
+@dataclass(frozen=True)
+class Compare:
+    """A WHERE comparison: column op value."""
+    __slots__ = ('column', 'op', 'value')
+    column: str
+    op: Op
+    value: Any
+
+@dataclass(frozen=True)
+class BinOp:
+    """Two WHERE conditions joined by AND or OR."""
+    __slots__ = ('op', 'left', 'right')
+    op: Op
+    left: 'Condition'
+    right: 'Condition'
+
+Condition = Union[Compare, BinOp]
+
+@dataclass(frozen=True)
 class CreateTableStmt:
+    __slots__ = ('table_name', 'columns')
     table_name: str
     columns: List[Dict]
 
-@dataclass
+@dataclass(frozen=True)
 class DropTableStmt:
+    __slots__ = ('table_name',)
     table_name: str
 
-@dataclass
+@dataclass(frozen=True)
 class InsertStmt:
+    __slots__ = ('table_name', 'columns', 'values')
     table_name: str
     columns: List[str]
     values: List[Any]
 
-@dataclass
+@dataclass(frozen=True)
 class SelectStmt:
+    __slots__ = ('columns', 'table_name', 'joins', 'where', 'order_by', 'limit')
     columns: List[str]
     table_name: str
     joins: List[Dict]
-    where: Optional[Any]
+    where: Optional[Condition]
     order_by: Optional[List[Tuple[str, str]]]
     limit: Optional[int]
 
-@dataclass
+@dataclass(frozen=True)
 class UpdateStmt:
+    __slots__ = ('table_name', 'assignments', 'where')
     table_name: str
     assignments: Dict[str, Any]
-    where: Optional[Any]
+    where: Optional[Condition]
 
-@dataclass
+@dataclass(frozen=True)
 class DeleteStmt:
+    __slots__ = ('table_name', 'where')
     table_name: str
-    where: Optional[Any]
+    where: Optional[Condition]
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
+    def __init__(self, types: List[int], values: List[Any]):
+        self.types = types
+        self.values = values
+        self.n = len(types)
         self.pos = 0
     
-    def current(self) -> Optional[Token]:
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+    def current_type(self) -> Optional[int]:
+        return self.types[self.pos] if self.pos < self.n else None
     
-    def peek(self, offset: int = 0) -> Optional[Token]:
-        idx = self.pos + offset
-        return self.tokens[idx] if idx < len(self.tokens) else None
+    def current_value(self) -> Any:
+        return self.values[self.pos] if self.pos < self.n else None
     
-    def consume(self, expected_type: str = None, expected_value: Any = None) -> Token:
-        token = self.current()
-        if token is None:
+    def consume(self, expected_type: int = None, expected_value: Any = None) -> Any:
+        """Consume the current token and return its value."""
+        pos = self.pos
+        if pos >= self.n:
             raise SyntaxError("Unexpected end of input")
-        if expected_type and token.type != expected_type:
-            raise SyntaxError(f"Expected {expected_type}, got {token.type}")
-        if expected_value and token.value != expected_value:
-            raise SyntaxError(f"Expected '{expected_value}', got '{token.value}'")
-        self.pos += 1
-        return token
+        type_ = self.types[pos]
+        value = self.values[pos]
+        if expected_type is not None and type_ != expected_type:
+            raise SyntaxError(f"Expected {_TYPE_NAMES[expected_type]}, got {_TYPE_NAMES[type_]}")
+        if expected_value and value != expected_value:
+            raise SyntaxError(f"Expected '{expected_value}', got '{value}'")
+        self.pos = pos + 1
+        return value
     
-    def match(self, type_: str, value: Any = None) -> bool:
-        token = self.current()
-        if token and token.type == type_:
-            if value is None or token.value == value:
-                return True
-        return False
+    def match(self, type_: int, value: Any = None) -> bool:
+        pos = self.pos
+        return (pos < self.n and self.types[pos] == type_
+                and (value is None or self.values[pos] == value))
     
     def parse(self):
-        token = self.current()
-        if not token:
+        if self.pos >= self.n:
             raise SyntaxError("Empty query")
         
-        if token.type == 'KEYWORD':
-            if token.value == 'CREATE':
-                return self.parse_create()
-            elif token.value == 'DROP':
-                return self.parse_drop()
-            elif token.value == 'INSERT':
-                return self.parse_insert()
-            elif token.value == 'SELECT':
-                return self.parse_select()
-            elif token.value == 'UPDATE':
-                return self.parse_update()
-            elif token.value == 'DELETE':
-                return self.parse_delete()
+        if self.types[self.pos] == _T_KEYWORD:
+            handler = self._STMT_DISPATCH.get(self.values[self.pos])
+            if handler is not None:
+                return handler(self)
         
-        raise SyntaxError(f"Unknown statement: {token.value}")
+        raise SyntaxError(f"Unknown statement: {self.values[self.pos]}")
 
     def parse_create(self) -> CreateTableStmt:
-        self.consume('KEYWORD', 'CREATE')
-        self.consume('KEYWORD', 'TABLE')
-        table_name = self.consume('IDENT').value
-        self.consume('OP', '(')
+        self.consume(_T_KEYWORD, 'CREATE')
+        self.consume(_T_KEYWORD, 'TABLE')
+        table_name = self.consume(_T_IDENT)
+        self.consume(_T_OP, '(')
         
         columns = []
         while True:
-            col_name = self.consume('IDENT').value
-            col_type = self.consume('KEYWORD').value
+            col_name = self.consume(_T_IDENT)
+            col_type = self.consume(_T_KEYWORD)
             
             col_def = {'name': col_name, 'type': col_type, 'primary_key': False,
                        'unique': False, 'not_null': False}
             
             # Parse constraints
-            while self.match('KEYWORD'):
-                kw = self.current().value
-                if kw == 'PRIMARY':
-                    self.consume()
-                    self.consume('KEYWORD', 'KEY')
-                    col_def['primary_key'] = True
-                elif kw == 'UNIQUE':
-                    self.consume()
-                    col_def['unique'] = True
-                elif kw == 'NOT':
-                    self.consume()
-                    self.consume('KEYWORD', 'NULL')
-                    col_def['not_null'] = True
-                else:
+            while self.match(_T_KEYWORD):
+                handler = self._CONSTRAINT_HANDLERS.get(self.current_value())
+                if handler is None:
                     break
+                handler(self, col_def)
             
             columns.append(col_def)
             
-            if self.match('OP', ','):
+            if self.match(_T_OP, ','):
                 self.consume()
             else:
                 break
         
-        self.consume('OP', ')')
+        self.consume(_T_OP, ')')
         return CreateTableStmt(table_name, columns)
     
+    def parse_primary_key(self, col_def: Dict):
+        self.consume(_T_KEYWORD, 'PRIMARY')
+        self.consume(_T_KEYWORD, 'KEY')
+        col_def['primary_key'] = True
+    
+    def parse_unique(self, col_def: Dict):
+        self.consume(_T_KEYWORD, 'UNIQUE')
+        col_def['unique'] = True
+    
+    def parse_not_null(self, col_def: Dict):
+        self.consume(_T_KEYWORD, 'NOT')
+        self.consume(_T_KEYWORD, 'NULL')
+        col_def['not_null'] = True
+    
+    _CONSTRAINT_HANDLERS = {
+        'PRIMARY': parse_primary_key,
+        'UNIQUE': parse_unique,
+        'NOT': parse_not_null,
+    }
+    
     def parse_drop(self) -> DropTableStmt:
-        self.consume('KEYWORD', 'DROP')
-        self.consume('KEYWORD', 'TABLE')
-        table_name = self.consume('IDENT').value
+        self.consume(_T_KEYWORD, 'DROP')
+        self.consume(_T_KEYWORD, 'TABLE')
+        table_name = self.consume(_T_IDENT)
         return DropTableStmt(table_name)
     
     def parse_insert(self) -> InsertStmt:
-        self.consume('KEYWORD', 'INSERT')
-        self.consume('KEYWORD', 'INTO')
-        table_name = self.consume('IDENT').value
+        self.consume(_T_KEYWORD, 'INSERT')
+        self.consume(_T_KEYWORD, 'INTO')
+        table_name = self.consume(_T_IDENT)
         
         columns = []
-        if self.match('OP', '('):
+        if self.match(_T_OP, '('):
             self.consume()
             while True:
-                columns.append(self.consume('IDENT').value)
-                if self.match('OP', ','):
+                columns.append(self.consume(_T_IDENT))
+                if self.match(_T_OP, ','):
                     self.consume()
                 else:
                     break
-            self.consume('OP', ')')
+            self.consume(_T_OP, ')')
         
-        self.consume('KEYWORD', 'VALUES')
-        self.consume('OP', '(')
+        self.consume(_T_KEYWORD, 'VALUES')
+        self.consume(_T_OP, '(')
         
         values = []
         while True:
             values.append(self.parse_value())
-            if self.match('OP', ','):
+            if self.match(_T_OP, ','):
                 self.consume()
             else:
                 break
         
-        self.consume('OP', ')')
+        self.consume(_T_OP, ')')
         return InsertStmt(table_name, columns, values)
     
     def parse_value(self) -> Any:
-        token = self.current()
-        if token.type == 'STRING':
-            self.consume()
-            return token.value
-        elif token.type == 'NUMBER':
-            self.consume()
-            return token.value
-        elif token.type == 'KEYWORD' and token.value == 'NULL':
-            self.consume()
+        type_ = self.current_type()
+        if type_ is None:
+            raise SyntaxError("Unexpected end of input")
+        value = self.values[self.pos]
+        if type_ == _T_STRING or type_ == _T_NUMBER:
+            self.pos += 1
+            return value
+        elif type_ == _T_KEYWORD and value == 'NULL':
+            self.pos += 1
             return None
-        elif token.type == 'IDENT':
-            self.consume()
-            val = token.value.lower()
+        elif type_ == _T_PARAM:
+            self.pos += 1
+            return Param(value)
+        elif type_ == _T_IDENT:
+            self.pos += 1
+            val = value.lower()
             if val == 'true':
                 return True
             elif val == 'false':
                 return False
-            return token.value
-        raise SyntaxError(f"Expected value, got {token}")
+            return value
+        raise SyntaxError(f"Expected value, got {_TYPE_NAMES[type_]} '{value}'")
 
     def parse_select(self) -> SelectStmt:
-        self.consume('KEYWORD', 'SELECT')
+        self.consume(_T_KEYWORD, 'SELECT')
         
         columns = []
-        if self.match('OP', '*'):
+        if self.match(_T_OP, '*'):
             self.consume()
             columns = ['*']
         else:
             while True:
-                col = self.consume('IDENT').value
-                # Handle table.column notation
-                if self.match('OP', '.'):
-                    self.consume()
-                    col = col + '.' + self.consume('IDENT').value
+                col = self.parse_column_ref()
                 columns.append(col)
-                if self.match('OP', ','):
+                if self.match(_T_OP, ','):
                     self.consume()
-                elif self.match('KEYWORD', 'FROM'):
+                elif self.match(_T_KEYWORD, 'FROM'):
                     break
                 else:
                     break
         
-        self.consume('KEYWORD', 'FROM')
-        table_name = self.consume('IDENT').value
+        self.consume(_T_KEYWORD, 'FROM')
+        table_name = self.consume(_T_IDENT)
         
         # Handle table alias
         table_alias = None
-        if self.match('IDENT') or self.match('KEYWORD', 'AS'):
-            if self.match('KEYWORD', 'AS'):
+        if self.match(_T_IDENT) or self.match(_T_KEYWORD, 'AS'):
+            if self.match(_T_KEYWORD, 'AS'):
                 self.consume()
-            table_alias = self.consume('IDENT').value
+            table_alias = self.consume(_T_IDENT)
         
         # Parse JOINs
         joins = []
-        while self.match('KEYWORD', 'JOIN') or self.match('KEYWORD', 'INNER'):
-            if self.match('KEYWORD', 'INNER'):
+        while self.match(_T_KEYWORD, 'JOIN') or self.match(_T_KEYWORD, 'INNER'):
+            if self.match(_T_KEYWORD, 'INNER'):
                 self.consume()
-            self.consume('KEYWORD', 'JOIN')
-            join_table = self.consume('IDENT').value
+            self.consume(_T_KEYWORD, 'JOIN')
+            join_table = self.consume(_T_IDENT)
             join_alias = None
-            if self.match('IDENT') or self.match('KEYWORD', 'AS'):
-                if self.match('KEYWORD', 'AS'):
+            if self.match(_T_IDENT) or self.match(_T_KEYWORD, 'AS'):
+                if self.match(_T_KEYWORD, 'AS'):
                     self.consume()
-                join_alias = self.consume('IDENT').value
+                join_alias = self.consume(_T_IDENT)
             
-            self.consume('KEYWORD', 'ON')
-            left_col = self.consume('IDENT').value
-            if self.match('OP', '.'):
-                self.consume()
-                left_col = left_col + '.' + self.consume('IDENT').value
-            self.consume('OP', '=')
-            right_col = self.consume('IDENT').value
-            if self.match('OP', '.'):
-                self.consume()
-                right_col = right_col + '.' + self.consume('IDENT').value
+            self.consume(_T_KEYWORD, 'ON')
+            left_col = self.parse_column_ref()
+            self.consume(_T_OP, '=')
+            right_col = self.parse_column_ref()
             
             joins.append({
                 'table': join_table,
@@ -342,103 +413,193 @@ class Parser:
         
         # Parse WHERE
         where = None
-        if self.match('KEYWORD', 'WHERE'):
+        if self.match(_T_KEYWORD, 'WHERE'):
             self.consume()
             where = self.parse_condition()
         
         # Parse ORDER BY
         order_by = None
-        if self.match('KEYWORD', 'ORDER'):
+        if self.match(_T_KEYWORD, 'ORDER'):
             self.consume()
-            self.consume('KEYWORD', 'BY')
+            self.consume(_T_KEYWORD, 'BY')
             order_by = []
             while True:
-                col = self.consume('IDENT').value
+                col = self.consume(_T_IDENT)
                 direction = 'ASC'
-                if self.match('KEYWORD', 'ASC'):
+                if self.match(_T_KEYWORD, 'ASC'):
                     self.consume()
-                elif self.match('KEYWORD', 'DESC'):
+                elif self.match(_T_KEYWORD, 'DESC'):
                     self.consume()
                     direction = 'DESC'
                 order_by.append((col, direction))
-                if self.match('OP', ','):
+                if self.match(_T_OP, ','):
                     self.consume()
                 else:
                     break
         
         # Parse LIMIT
         limit = None
-        if self.match('KEYWORD', 'LIMIT'):
+        if self.match(_T_KEYWORD, 'LIMIT'):
             self.consume()
-            limit = int(self.consume('NUMBER').value)
+            limit = int(self.consume(_T_NUMBER))
         
         return SelectStmt(columns, table_name, joins, where, order_by, limit)
 
     def parse_update(self) -> UpdateStmt:
-        self.consume('KEYWORD', 'UPDATE')
-        table_name = self.consume('IDENT').value
-        self.consume('KEYWORD', 'SET')
+        self.consume(_T_KEYWORD, 'UPDATE')
+        table_name = self.consume(_T_IDENT)
+        self.consume(_T_KEYWORD, 'SET')
         
         assignments = {}
         while True:
-            col = self.consume('IDENT').value
-            self.consume('OP', '=')
+            col = self.consume(_T_IDENT)
+            self.consume(_T_OP, '=')
             val = self.parse_value()
             assignments[col] = val
-            if self.match('OP', ','):
+            if self.match(_T_OP, ','):
                 self.consume()
             else:
                 break
         
         where = None
-        if self.match('KEYWORD', 'WHERE'):
+        if self.match(_T_KEYWORD, 'WHERE'):
             self.consume()
             where = self.parse_condition()
         
         return UpdateStmt(table_name, assignments, where)
     
     def parse_delete(self) -> DeleteStmt:
-        self.consume('KEYWORD', 'DELETE')
-        self.consume('KEYWORD', 'FROM')
-        table_name = self.consume('IDENT').value
+        self.consume(_T_KEYWORD, 'DELETE')
+        self.consume(_T_KEYWORD, 'FROM')
+        table_name = self.consume(_T_IDENT)
         
         where = None
-        if self.match('KEYWORD', 'WHERE'):
+        if self.match(_T_KEYWORD, 'WHERE'):
             self.consume()
             where = self.parse_condition()
         
         return DeleteStmt(table_name, where)
     
-    def parse_condition(self):
+    _STMT_DISPATCH = {
+        'CREATE': parse_create,
+        'DROP': parse_drop,
+        'INSERT': parse_insert,
+        'SELECT': parse_select,
+        'UPDATE': parse_update,
+        'DELETE': parse_delete,
+    }
+    
+    def parse_condition(self) -> Condition:
         """Parse WHERE conditions with AND/OR support."""
+        return self.parse_expr()
+    
+    def parse_expr(self, min_prec: int = 1) -> Condition:
+        """Parse an AND/OR chain by precedence climbing.
+
+        AND binds tighter than OR, and operators of equal precedence group
+        left to right.
+        """
         left = self.parse_comparison()
-        
-        while self.match('KEYWORD', 'AND') or self.match('KEYWORD', 'OR'):
-            op = self.consume().value
-            right = self.parse_comparison()
-            left = {'op': op, 'left': left, 'right': right}
-        
+        while self.match(_T_KEYWORD):
+            word = self.values[self.pos]
+            prec = _PREC.get(word, 0)
+            if prec < min_prec:
+                break
+            self.pos += 1
+            right = self.parse_expr(prec + 1)
+            left = BinOp(_OP_MAP[word], left, right)
         return left
     
+    def parse_column_ref(self) -> str:
+        """Parse a column name, optionally qualified as table.column."""
+        col = self.consume(_T_IDENT)
+        if self.match(_T_OP, '.'):
+            self.consume()
+            # Built in one step and interned, as the executor uses it as a key
+            col = sys.intern(f"{col}.{self.consume(_T_IDENT)}")
+        return col
+    
     def parse_comparison(self):
         """Parse a single comparison."""
-        col = self.consume('IDENT').value
-        # Handle table.column
-        if self.match('OP', '.'):
-            self.consume()
-            col = col + '.' + self.consume('IDENT').value
+        col = self.parse_column_ref()
         
-        op = self.consume('OP').value
-        if op == '<>':
-            op = '!='
+        text = self.consume(_T_OP)
+        op = _OP_MAP.get(text)
+        if op is None:
+            raise SyntaxError(f"Unknown operator: {text}")
         
         value = self.parse_value()
-        return {'column': col, 'op': op, 'value': value}
+        return Compare(col, op, value)
 
 
 def parse_sql(sql: str):
     """Parse SQL string and return AST."""
     tokenizer = Tokenizer(sql)
-    tokens = tokenizer.tokenize()
-    parser = Parser(tokens)
+    types, values = tokenizer.tokenize()
+    parser = Parser(types, values)
     return parser.parse()
+
+
+def normalize_literals(sql: str) -> Tuple[str, Tuple]:
+    """Replace the string and number literals in sql with ``?`` placeholders.
+
+    Returns the template and the literal values in order, so statements that
+    only differ in their values can share one parsed template. SQL that
+    already uses placeholders should not be normalized.
+    """
+    parts = []
+    values = []
+    last = 0
+    for m in _LITERAL_RE.finditer(sql):
+        kind = m.lastgroup
+        if kind == 'LIMIT' or kind == 'COMMENT':
+            continue
+        text = m.group()
+        parts.append(sql[last:m.start()])
+        parts.append('?')
+        last = m.end()
+        if kind == 'STRING':
+            values.append(text[1:-1])
+        else:
+            values.append(float(text) if '.' in text else int(text))
+    
+    if not values:
+        return sql, ()
+    parts.append(sql[last:])
+    return ''.join(parts), tuple(values)
+
+
+def bind_params(stmt, params: Sequence):
+    """Return a copy of stmt with ``?`` placeholders replaced by params.
+
+    The parsed statement itself is left untouched so it can be reused.
+    """
+    used = 0
+    
+    def bind(value):
+        nonlocal used
+        if not isinstance(value, Param):
+            return value
+        used += 1
+        if value.index >= len(params):
+            raise ValueError(f"Missing value for parameter {value.index + 1}")
+        return params[value.index]
+    
+    def bind_condition(cond):
+        if cond is None:
+            return None
+        if isinstance(cond, Compare):
+            return Compare(cond.column, cond.op, bind(cond.value))
+        return BinOp(cond.op, bind_condition(cond.left), bind_condition(cond.right))
+    
+    if isinstance(stmt, InsertStmt):
+        stmt = replace(stmt, values=[bind(v) for v in stmt.values])
+    elif isinstance(stmt, UpdateStmt):
+        stmt = replace(stmt, assignments={k: bind(v) for k, v in stmt.assignments.items()},
+                       where=bind_condition(stmt.where))
+    elif isinstance(stmt, (SelectStmt, DeleteStmt)):
+        stmt = replace(stmt, where=bind_condition(stmt.where))
+    
+    if used != len(params):
+        raise ValueError(f"Expected {used} parameters, got {len(params)}")
+    return stmt
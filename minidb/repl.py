@@ -32,6 +32,51 @@ Example:
   SELECT * FROM users;
 """)
 
+def _do_quit(db, arg):
+    print("Bye!")
+    return True
+
+def _do_help(db, arg):
+    print_help()
+
+def _do_tables(db, arg):
+    tables = list(db.tables.keys())
+    if tables:
+        print('\n'.join(tables))
+    else:
+        print("No tables")
+
+def _do_schema(db, arg):
+    table_name = arg
+    if table_name in db.tables:
+        table = db.tables[table_name]
+        cols = []
+        for col_name in table.column_order:
+            col = table.columns[col_name]
+            parts = [col.name, col.dtype]
+            if col.primary_key:
+                parts.append('PRIMARY KEY')
+            elif col.unique:
+                parts.append('UNIQUE')
+            if col.not_null and not col.primary_key:
+                parts.append('NOT NULL')
+            cols.append(' '.join(parts))
+        print(f"CREATE TABLE {table_name} (")
+        print('  ' + ',\n  '.join(cols))
+        print(");")
+    else:
+        print(f"Table '{table_name}' not found")
+
+# Dot command -> (handler, needs_argument). A handler returning True exits
+# the REPL.
+_DOT_CMDS = {
+    '.quit': (_do_quit, False),
+    '.exit': (_do_quit, False),
+    '.help': (_do_help, False),
+    '.tables': (_do_tables, False),
+    '.schema': (_do_schema, True),
+}
+
 def run_repl(db_path: str = 'minidb.json'):
     """Run interactive REPL."""
     db = Database(db_path)
@@ -52,41 +97,15 @@ def run_repl(db_path: str = 'minidb.json'):
             continue
         
         # Handle dot commands
-        if line.startswith('.'):
-            cmd = line.lower().split()
-            if cmd[0] == '.quit' or cmd[0] == '.exit':
-                print("Bye!")
-                break
-            elif cmd[0] == '.help':
-                print_help()
-            elif cmd[0] == '.tables':
-                tables = list(db.tables.keys())
-                if tables:
-                    print('\n'.join(tables))
-                else:
-                    print("No tables")
-            elif cmd[0] == '.schema' and len(cmd) > 1:
-                table_name = cmd[1]
-                if table_name in db.tables:
-                    table = db.tables[table_name]
-                    cols = []
-                    for col_name in table.column_order:
-                        col = table.columns[col_name]
-                        parts = [col.name, col.dtype]
-                        if col.primary_key:
-                            parts.append('PRIMARY KEY')
-                        elif col.unique:
-                            parts.append('UNIQUE')
-                        if col.not_null and not col.primary_key:
-                            parts.append('NOT NULL')
-                        cols.append(' '.join(parts))
-                    print(f"CREATE TABLE {table_name} (")
-                    print('  ' + ',\n  '.join(cols))
-                    print(");")
-                else:
-                    print(f"Table '{table_name}' not found")
-            else:
+        if line[0] == '.':
+            parts = line.lower().split(None, 1)
+            cmd = parts[0]
+            arg = parts[1].split(None, 1)[0] if len(parts) > 1 else ''
+            handler, needs_arg = _DOT_CMDS.get(cmd, (None, False))
+            if handler is None or (needs_arg and not arg):
                 print(f"Unknown command: {line}")
+            elif handler(db, arg):
+                break
             continue
         
         # Execute SQL